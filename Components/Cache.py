@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import time
+
+CACHE_DIR = os.path.expanduser("~/.cache/ai-shorts")
+# Entries kept per namespace; the least recently used ones are removed past this
+MAX_ENTRIES = 200
+
+def cache_key(*parts):
+    # Stable key for any JSON-serialisable inputs
+    content = json.dumps(parts, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+def cache_path(namespace, key):
+    return os.path.join(CACHE_DIR, namespace, key + ".json")
+
+def load_cached(namespace, key):
+    path = cache_path(namespace, key)
+    try:
+        with open(path, "rb") as f:
+            data = json.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        # A damaged entry is a miss, it is overwritten by the next save
+        return None
+    except OSError as e:
+        # An unreadable cache (bad permissions, ~/.cache not a directory, ...) is a miss too
+        print(f"Could not read {namespace} cache: {e}")
+        return None
+    # Bump the mtime so eviction sees this entry as recently used
+    try:
+        os.utime(path)
+    except OSError:
+        # Evicted by another run since it was read, or the cache is read-only; the data is still good
+        pass
+    return data
+
+def evict(namespace, max_entries=MAX_ENTRIES):
+    # One directory pass (plus one stat per entry on POSIX) to find entries and leftover temp files
+    entries = []
+    stale = time.time() - 3600
+    with os.scandir(os.path.join(CACHE_DIR, namespace)) as it:
+        for e in it:
+            if not e.name.endswith((".json", ".tmp")):
+                continue
+            try:
+                mtime = e.stat().st_mtime
+            except FileNotFoundError:
+                # Evicted or renamed into place by another run since the listing
+                continue
+            if e.name.endswith(".json"):
+                entries.append((mtime, e.path))
+            elif mtime < stale:
+                # Left behind by a run killed mid-write
+                try:
+                    os.unlink(e.path)
+                except FileNotFoundError:
+                    pass
+    if len(entries) <= max_entries:
+        return
+    entries.sort()
+    for _, path in entries[:len(entries) - max_entries]:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+def save_cached(namespace, key, data):
+    # Best-effort: the result is already computed, so a cache that cannot be written
+    # (read-only, full disk, ...) is reported instead of failing the caller
+    path = cache_path(namespace, key)
+    # Write to a temp file and swap it in, so an interrupted run never leaves a truncated entry
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps(data, separators=(",", ":")).encode())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    except OSError as e:
+        print(f"Could not save {namespace} cache entry: {e}")
+        return
+    # The entry is already written, a failed cleanup must not fail the save
+    try:
+        evict(namespace)
+    except OSError as e:
+        print(f"Could not evict old {namespace} cache entries: {e}")
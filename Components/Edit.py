@@ -1,13 +1,42 @@
-from moviepy.video.io.VideoFileClip import VideoFileClip
-from moviepy.editor import VideoFileClip
 import subprocess
 
+_nvenc_available = None
+
+def has_nvenc():
+    # Encode a few blank frames once: listing the encoder is not enough when no GPU is present.
+    # Use a p-preset like the real encodes do, ffmpeg before 4.3 has h264_nvenc but rejects them
+    global _nvenc_available
+    if _nvenc_available is None:
+        command = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error",
+            "-f", "lavfi", "-i", "color=c=black:s=256x256:d=0.1",
+            "-c:v", "h264_nvenc", "-preset", "p4", "-f", "null", "-",
+        ]
+        try:
+            _nvenc_available = subprocess.run(command, capture_output=True).returncode == 0
+        except FileNotFoundError:
+            _nvenc_available = False
+    return _nvenc_available
+
+
+# Closest NVENC preset for each x264 speed preset
+NVENC_PRESETS = {"ultrafast": "p1", "superfast": "p2", "veryfast": "p2", "faster": "p3", "fast": "p3", "medium": "p4"}
+
+def video_encoder_args(preset="medium"):
+    if has_nvenc():
+        return ["-c:v", "h264_nvenc", "-preset", NVENC_PRESETS.get(preset, "p4")]
+    return ["-c:v", "libx264", "-preset", preset, "-threads", "0"]
+
 def extractAudio(video_path):
     try:
-        video_clip = VideoFileClip(video_path)
         audio_path = "audio.wav"
-        video_clip.audio.write_audiofile(audio_path)
-        video_clip.close()
+        # Decode straight to the 16 kHz mono PCM Whisper works on, skipping the video stream
+        command = [
+            "ffmpeg", "-y", "-loglevel", "error", "-nostats", "-i", video_path,
+            "-vn", "-ac", "1", "-ar", "16000", "-c:a", "pcm_s16le",
+            audio_path,
+        ]
+        subprocess.run(command, check=True)
         print(f"Extracted audio to: {audio_path}")
         return audio_path
     except Exception as e:
@@ -15,10 +44,71 @@ def extractAudio(video_path):
         return None
 
 
-def crop_video(input_file, output_file, start_time, end_time):
-    with VideoFileClip(input_file) as video:
-        cropped_video = video.subclip(start_time, end_time)
-        cropped_video.write_videofile(output_file, codec='libx264')
+def get_keyframe_before(video_path, time, window=20):
+    # Read packet flags only (no decoding) in a short window before `time`
+    command = [
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-read_intervals", f"{max(time - window, 0)}%{time + 0.5}",
+        "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0",
+        video_path,
+    ]
+    result = subprocess.run(command, check=True, stdout=subprocess.PIPE, text=True)
+    keyframe = None
+    for line in result.stdout.splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags and pts not in ("", "N/A") and float(pts) <= time:
+            keyframe = float(pts)
+    return keyframe
+
+
+def snap_to_keyframe(video_path, time, max_shift=2.0):
+    # Move a cut start back onto the previous keyframe (at most max_shift seconds)
+    # so crop_video can stream copy instead of re-encoding.
+    # Returns the start and whether it is a keyframe, pass the latter on to crop_video
+    try:
+        keyframe = get_keyframe_before(video_path, time)
+    except Exception as e:
+        print(f"Could not read keyframes: {e}")
+        return time, False
+    if keyframe is None or time - keyframe > max_shift:
+        return time, False
+    return keyframe, True
+
+
+def crop_video(input_file, output_file, start_time, end_time, tolerance=0.1, keyframe=None):
+    # A stream copy always starts on a keyframe, so only use it when start_time is one.
+    # keyframe=True/False skips probing when the caller already knows (see snap_to_keyframe)
+    if keyframe is None:
+        try:
+            before = get_keyframe_before(input_file, start_time)
+        except Exception as e:
+            print(f"Could not read keyframes, re-encoding the cut: {e}")
+            before = None
+        keyframe = before is not None and start_time - before <= tolerance
+
+    if keyframe:
+        command = [
+            "ffmpeg", "-y", "-loglevel", "error", "-nostats",
+            "-ss", str(start_time), "-i", input_file,
+            "-t", str(end_time - start_time),
+            "-c", "copy", "-avoid_negative_ts", "make_zero",
+            output_file,
+        ]
+        try:
+            subprocess.run(command, check=True)
+            return
+        except subprocess.CalledProcessError as e:
+            print(f"Stream copy failed, re-encoding the cut: {e}")
+
+    # Frame accurate fallback; Out.mp4 is re-encoded again later, so encode it as fast as possible
+    command = [
+        "ffmpeg", "-y", "-loglevel", "error", "-nostats",
+        "-ss", str(start_time), "-thread_type", "frame+slice", "-i", input_file,
+        "-t", str(end_time - start_time),
+        *video_encoder_args("ultrafast"), "-c:a", "aac",
+        output_file,
+    ]
+    subprocess.run(command, check=True)
 
 # Example usage:
 if __name__ == "__main__":
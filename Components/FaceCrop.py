@@ -1,14 +1,20 @@
 import cv2
 import numpy as np
-from moviepy.editor import *
+import subprocess
+import time
 from Components.Speaker import detect_faces_and_speakers, Frames
-global Fps
+from Components.FramePipeline import open_capture, read_frames, write_frames, FFmpegWriter
+from Components.Edit import video_encoder_args
 
-def crop_to_vertical(input_video_path, output_video_path):
+# Load the cascade once per process, it is reused by every crop
+face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+# Faces are searched for on frames scaled down to this height, the crop itself stays full resolution
+DETECTION_HEIGHT = 480
+
+def crop_to_vertical(input_video_path, output_video_path, audio_source=None, face_stride=5):
     detect_faces_and_speakers(input_video_path, "DecOut.mp4")
-    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
 
-    cap = cv2.VideoCapture(input_video_path, cv2.CAP_FFMPEG)
+    cap = open_capture(input_video_path)
     if not cap.isOpened():
         print("Error: Could not open video.")
         return
@@ -25,6 +31,7 @@ def crop_to_vertical(input_video_path, output_video_path):
 
     if original_width < vertical_width:
         print("Error: Original video width is less than the desired vertical width.")
+        cap.release()
         return
 
     x_start = (original_width - vertical_width) // 2
@@ -33,19 +40,27 @@ def crop_to_vertical(input_video_path, output_video_path):
     print(x_end-x_start)
     half_width = vertical_width // 2
 
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_video_path, fourcc, fps, (vertical_width, vertical_height))
-    global Fps
-    Fps = fps
+    # Encode the crop once with ffmpeg; given audio_source its sound is muxed in the same pass
+    out = FFmpegWriter(output_video_path, fps, (vertical_width, vertical_height),
+                       [*video_encoder_args("medium"), "-b:v", "3000k", "-movflags", "+faststart"], audio_source)
+    # Decode, face tracking and encode run as three overlapping stages
+    writer = write_frames(out)
     print(fps)
+    # The Haar cascade cost grows with pixel count, so detect on a smaller copy
+    scale = min(1.0, DETECTION_HEIGHT / original_height)
+    min_size = (max(1, int(30 * scale)), max(1, int(30 * scale)))
     count = 0
-    for _ in range(total_frames):
-        ret, frame = cap.read()
-        if not ret:
-            print("Error: Could not read frame.")
-            break
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+    last_report = 0.0
+    for frame in read_frames(cap):
+        # Faces barely move between neighbouring frames, so only search every face_stride frames
+        if count % face_stride == 0:
+            small = frame
+            if scale < 1.0:
+                small = cv2.resize(frame, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+            faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=min_size)
+            if len(faces) > 0:
+                faces = (faces / scale).astype(int)
         if len(faces) >-1:
             if len(faces) == 0:
                 (x, y, w, h) = Frames[count]
@@ -59,20 +74,15 @@ def crop_to_vertical(input_video_path, output_video_path):
                 (X, Y, W, H) = Frames[count][0]
                 print(Frames[count][0])
             
-            for f in faces:
-                x1, y1, w1, h1 = f
-                center = x1+ w1//2
-                if center > X and center < X+W:
-                    x = x1
-                    y = y1
-                    w = w1
-                    h = h1
-                    break
+            # Pick the first face whose centre lies inside the active speaker box
+            if len(faces) > 0:
+                centers = faces[:, 0] + faces[:, 2] // 2
+                matches = np.flatnonzero((centers > X) & (centers < X + W))
+                if len(matches) > 0:
+                    (x, y, w, h) = faces[matches[0]]
 
             # print(faces[0])
             centerX = x+(w//2)
-            print(centerX)
-            print(x_start - (centerX - half_width))
             if count == 0 or (x_start - (centerX - half_width)) <1 :
                 ## IF dif from prev fram is low then no movement is done
                 pass #use prev vals
@@ -99,29 +109,39 @@ def crop_to_vertical(input_video_path, output_video_path):
             x_start = (original_width - vertical_width) // 2
             x_end = x_start + vertical_width
             cropped_frame = frame[:, x_start:x_end]
-        
-        print(cropped_frame.shape)
 
-        out.write(cropped_frame)
+        # Report progress a couple of times a second rather than once per frame
+        now = time.monotonic()
+        if now - last_report >= 0.5:
+            print(f"Cropping frame {count}/{total_frames}")
+            last_report = now
+
+        writer.put(cropped_frame)
 
+    writer.close()
     cap.release()
-    out.release()
+    if not out.release():
+        print("Error: Cropping failed, no video was saved to", output_video_path)
+        return
     print("Cropping complete. The video has been saved to", output_video_path, count)
 
 
 
 def combine_videos(video_with_audio, video_without_audio, output_filename):
     try:
-        # Load video clips
-        clip_with_audio = VideoFileClip(video_with_audio)
-        clip_without_audio = VideoFileClip(video_without_audio)
-
-        audio = clip_with_audio.audio
-
-        combined_clip = clip_without_audio.set_audio(audio)
-
-        global Fps
-        combined_clip.write_videofile(output_filename, codec='libx264', audio_codec='aac', fps=Fps, preset='medium', bitrate='3000k')
+        # crop_to_vertical already writes H.264, so copy the picture as-is and only
+        # encode the audio taken from the original clip
+        command = [
+            "ffmpeg", "-y", "-loglevel", "error", "-nostats",
+            "-i", video_without_audio,
+            "-i", video_with_audio,
+            "-map", "0:v:0", "-map", "1:a:0",
+            "-c:v", "copy",
+            "-c:a", "aac",
+            "-shortest",
+            output_filename,
+        ]
+        subprocess.run(command, check=True)
         print(f"Combined video saved successfully as {output_filename}")
     
     except Exception as e:
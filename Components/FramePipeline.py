@@ -0,0 +1,132 @@
+import queue
+import subprocess
+import threading
+import cv2
+
+
+def open_capture(path):
+    # Let FFmpeg decode on the GPU (NVDEC, VAAPI, ...) when one is available;
+    # ANY silently falls back to software decoding otherwise
+    return cv2.VideoCapture(path, cv2.CAP_FFMPEG, [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY])
+
+
+def read_frames(cap, prefetch=16):
+    # Decode ahead on a background thread so the caller's per-frame work
+    # overlaps with OpenCV's decoding (which releases the GIL)
+    frames = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+    error = None
+
+    def reader():
+        nonlocal error
+        try:
+            while not stop.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames.put(frame)
+        except Exception as e:
+            error = e
+        finally:
+            # Always end the stream, or the consumer would wait on get() forever
+            frames.put(None)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    try:
+        while True:
+            frame = frames.get()
+            if frame is None:
+                break
+            yield frame
+        if error is not None:
+            raise error
+    finally:
+        # Unblock the reader if the caller stopped early, so the capture can be released safely
+        stop.set()
+        while thread.is_alive():
+            try:
+                frames.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+class FrameWriterThread:
+    # Encodes frames on a background thread; put() each frame, then close()
+    def __init__(self, out, prefetch=16):
+        self.out = out
+        self.frames = queue.Queue(maxsize=prefetch)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            frame = self.frames.get()
+            if frame is None:
+                break
+            if self.error is not None:
+                # Keep draining after a failure so put() never blocks the producer
+                continue
+            try:
+                self.out.write(frame)
+            except Exception as e:
+                self.error = e
+
+    def put(self, frame):
+        self.frames.put(frame)
+
+    def close(self):
+        # Waits for the queued frames to be written and re-raises a write error
+        self.frames.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+
+def write_frames(out, prefetch=16):
+    # Encode on a background thread so the caller's per-frame work overlaps with the encoder
+    return FrameWriterThread(out, prefetch)
+
+
+class FFmpegWriter:
+    # Stand-in for cv2.VideoWriter that pipes raw BGR frames into a single ffmpeg
+    # encode, optionally muxing the audio track of another file in the same pass
+    def __init__(self, output_path, fps, size, encoder_args, audio_source=None):
+        width, height = size
+        command = [
+            "ffmpeg", "-y", "-loglevel", "error", "-nostats",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", str(fps),
+            "-i", "pipe:0",
+        ]
+        if audio_source:
+            command += ["-i", audio_source, "-map", "0:v:0", "-map", "1:a:0", "-c:a", "aac", "-shortest"]
+        # yuv420p needs even dimensions
+        command += [
+            "-vf", "crop=trunc(iw/2)*2:trunc(ih/2)*2", "-pix_fmt", "yuv420p",
+            *encoder_args, output_path,
+        ]
+        # -loglevel error keeps stderr quiet unless the encode actually fails
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        self.broken = False
+
+    def write(self, frame):
+        if self.broken:
+            return
+        try:
+            self.process.stdin.write(frame.tobytes())
+        except OSError:
+            # ffmpeg exited early (BrokenPipeError, or EINVAL on Windows);
+            # keep draining frames so the producer never blocks
+            self.broken = True
+
+    def release(self):
+        # Returns whether the encode succeeded
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        if self.process.wait() != 0:
+            print(f"Error: ffmpeg exited with code {self.process.returncode} while encoding")
+            return False
+        return True
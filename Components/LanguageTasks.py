@@ -1,11 +1,24 @@
 from openai import OpenAI
 from dotenv import load_dotenv
 import os
+from Components.Cache import cache_key, load_cached, save_cached
 load_dotenv()
 
-client = OpenAI(
-    api_key=os.getenv('OPENAI_API'), # Replace with your OpenAI API key
-)
+def has_api_key():
+    # Cheap local check so a missing key is caught before the download and transcription
+    key = os.getenv('OPENAI_API')
+    return bool(key) and key != "YOUR_KEY"
+
+_client = None
+
+def get_client():
+    # Built on first use and shared afterwards; cached highlights never need it
+    global _client
+    if _client is None:
+        _client = OpenAI(
+            api_key=os.getenv('OPENAI_API'), # Replace with your OpenAI API key
+        )
+    return _client
 
 
 import json
@@ -51,26 +64,42 @@ Any Example
 
 
 
-def GetHighlight(Transcription):
+MODEL = "gpt-4o-2024-05-13"
+TEMPERATURE = 0.7
+# Answers are sampled, so reusing a cached one is opt-in (CACHE_HIGHLIGHTS=1 in .env)
+CACHE_HIGHLIGHTS = os.getenv('CACHE_HIGHLIGHTS') == "1"
+
+def GetHighlight(Transcription, use_cache=CACHE_HIGHLIGHTS):
   print("Getting Highlight from Transcription ") 
-  response = client.chat.completions.create(
-    model="gpt-4o-2024-05-13",
-    temperature=0.7,
-    messages=[
-      {"role": "system", "content": system},
-      {"role": "user", "content": Transcription + system}
-    ]
-  )
-
-  json_string = response.choices[0].message.content
-  json_string = json_string.replace("json", "")
-  json_string = json_string.replace("```", "")
+  messages = [
+    {"role": "system", "content": system},
+    {"role": "user", "content": Transcription + system}
+  ]
+  # With caching on, re-runs on the same transcript reuse the last good answer instead of calling the API
+  key = cache_key(MODEL, TEMPERATURE, messages)
+  json_string = load_cached("highlights", key) if use_cache else None
+  from_cache = json_string is not None
+  if not from_cache:
+    if not has_api_key():
+      print("OPENAI_API is not set, add your OpenAI API key to the .env file")
+      return 0, 0
+    response = get_client().chat.completions.create(
+      model=MODEL,
+      temperature=TEMPERATURE,
+      messages=messages
+    )
+
+    json_string = response.choices[0].message.content
+    json_string = json_string.replace("json", "")
+    json_string = json_string.replace("```", "")
   # print(json_string)
   Start , End = extract_times(json_string)
   if Start == End:
     Ask = input("Error - Get Highlights again (y/n) -> ").lower()
     if Ask == 'y':
-      Start , End = GetHighlight(Transcription)
+      Start , End = GetHighlight(Transcription, use_cache=False)
+  elif use_cache and not from_cache:
+    save_cached("highlights", key, json_string)
   return Start, End
 
 
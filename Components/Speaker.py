@@ -1,18 +1,21 @@
 import cv2
 import numpy as np
 import webrtcvad
-import wave
-import contextlib
-from pydub import AudioSegment
 import os
+import subprocess
+import time
+from Components.FramePipeline import open_capture, read_frames, write_frames
 
 # Update paths to the model files
 prototxt_path = "models/deploy.prototxt"
 model_path = "models/res10_300x300_ssd_iter_140000_fp16.caffemodel"
-temp_audio_path = "temp_audio.wav"
 
 # Load DNN model
 net = cv2.dnn.readNetFromCaffe(prototxt_path, model_path)
+# Run the detector on the GPU when OpenCV was built with CUDA and a device is present
+if cv2.cuda.getCudaEnabledDeviceCount() > 0:
+    net.setPreferableBackend(cv2.dnn.DNN_BACKEND_CUDA)
+    net.setPreferableTarget(cv2.dnn.DNN_TARGET_CUDA)
 
 # Initialize VAD
 vad = webrtcvad.Vad(2)  # Aggressiveness mode from 0 to 3
@@ -20,10 +23,14 @@ vad = webrtcvad.Vad(2)  # Aggressiveness mode from 0 to 3
 def voice_activity_detection(audio_frame, sample_rate=16000):
     return vad.is_speech(audio_frame, sample_rate)
 
-def extract_audio_from_video(video_path, audio_path):
-    audio = AudioSegment.from_file(video_path)
-    audio = audio.set_frame_rate(16000).set_channels(1)
-    audio.export(audio_path, format="wav")
+def extract_audio_from_video(video_path, sample_rate=16000):
+    # Decode straight to raw 16-bit mono PCM in memory, no intermediate wav file
+    command = [
+        "ffmpeg", "-loglevel", "error", "-nostats", "-i", video_path,
+        "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "pipe:1",
+    ]
+    # Only stdout carries the audio, errors still reach the console
+    return subprocess.run(command, check=True, stdout=subprocess.PIPE).stdout
 
 def process_audio_frame(audio_data, sample_rate=16000, frame_duration_ms=30):
     n = int(sample_rate * frame_duration_ms / 1000) * 2  # 2 bytes per sample
@@ -35,34 +42,55 @@ def process_audio_frame(audio_data, sample_rate=16000, frame_duration_ms=30):
 
 global Frames
 Frames = [] # [x,y,w,h]
+# Identifies the video and stride Frames was computed for, so repeated calls can reuse it.
+# On reuse the preview video is not written again
+_frames_source = None
 
-def detect_faces_and_speakers(input_video_path, output_video_path):
+def detect_faces_and_speakers(input_video_path, output_video_path, face_stride=5):
     # Return Frams:
-    global Frames
-    # Extract audio from the video
-    extract_audio_from_video(input_video_path, temp_audio_path)
+    global Frames, _frames_source
+    stat = os.stat(input_video_path)
+    source = (os.path.abspath(input_video_path), stat.st_mtime, stat.st_size, face_stride)
+    if source == _frames_source:
+        print("Reusing face detections for", input_video_path)
+        return
+    # Clear in place, other modules hold a reference to this list
+    Frames.clear()
+    _frames_source = None
 
-    # Read the extracted audio
-    with contextlib.closing(wave.open(temp_audio_path, 'rb')) as wf:
-        sample_rate = wf.getframerate()
-        audio_data = wf.readframes(wf.getnframes())
+    # Extract audio from the video
+    sample_rate = 16000
+    audio_data = extract_audio_from_video(input_video_path, sample_rate)
 
-    cap = cv2.VideoCapture(input_video_path)
+    cap = open_capture(input_video_path)
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_video_path, fourcc, 30.0, (int(cap.get(3)), int(cap.get(4))))
+    width, height = int(cap.get(3)), int(cap.get(4))
+    out = cv2.VideoWriter(output_video_path, fourcc, 30.0, (width, height))
+    # Decode and encode on background threads while this loop runs the detector
+    frames = read_frames(cap)
+    writer = write_frames(out)
+
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    last_report = 0.0
+    # Only a pass that covered every frame may be reused, a stopped one leaves Frames short
+    complete = False
 
     frame_duration_ms = 30  # 30ms frames
     audio_generator = process_audio_frame(audio_data, sample_rate, frame_duration_ms)
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        h, w = frame.shape[:2]
-        blob = cv2.dnn.blobFromImage(cv2.resize(frame, (300, 300)), 1.0, (300, 300), (104.0, 177.0, 123.0))
-        net.setInput(blob)
-        detections = net.forward()
+    # Detections are relative to the frame size, which is fixed for the whole video
+    box_scale = np.array([width, height, width, height])
+
+    for count, frame in enumerate(frames):
+        # The detector dominates the loop; faces barely move between neighbouring
+        # frames, so run it every face_stride frames and reuse the boxes in between
+        if count % face_stride == 0:
+            # blobFromImage resizes to 300x300 itself, so no separate resized copy is needed
+            blob = cv2.dnn.blobFromImage(frame, 1.0, (300, 300), (104.0, 177.0, 123.0))
+            net.setInput(blob)
+            detections = net.forward()
+            # Threshold and scale all detections at once, then only loop over the kept faces
+            kept = detections[0, 0][detections[0, 0, :, 2] > 0.3]  # Confidence threshold
+            boxes = (kept[:, 3:7] * box_scale).astype("int")
 
         audio_frame = next(audio_generator, None)
         if audio_frame is None:
@@ -70,55 +98,48 @@ def detect_faces_and_speakers(input_video_path, output_video_path):
         is_speaking_audio = voice_activity_detection(audio_frame, sample_rate)
         MaxDif = 0
         Add = []
-        for i in range(detections.shape[2]):
-            confidence = detections[0, 0, i, 2]
-            if confidence > 0.3:  # Confidence threshold
-                box = detections[0, 0, i, 3:7] * np.array([w, h, w, h])
-                (x, y, x1, y1) = box.astype("int")
-                face_width = x1 - x
-                face_height = y1 - y
-
-                # Draw bounding box
-                cv2.rectangle(frame, (x, y), (x1, y1), (0, 255, 0), 2)
-
-                # Assuming lips are approximately at the bottom third of the face
-                lip_distance = abs((y + 2 * face_height // 3) - (y1))
-                Add.append([[x, y, x1, y1], lip_distance])
-
-                MaxDif == max(lip_distance, MaxDif)
-        for i in range(detections.shape[2]):
-            confidence = detections[0, 0, i, 2]
-            if confidence > 0.3:  # Confidence threshold
-                box = detections[0, 0, i, 3:7] * np.array([w, h, w, h])
-                (x, y, x1, y1) = box.astype("int")
-                face_width = x1 - x
-                face_height = y1 - y
-
-                # Draw bounding box
-                cv2.rectangle(frame, (x, y), (x1, y1), (0, 255, 0), 2)
-
-                # Assuming lips are approximately at the bottom third of the face
-                lip_distance = abs((y + 2 * face_height // 3) - (y1))
-                print(lip_distance)
-
-                # Combine visual and audio cues
-                if lip_distance >= MaxDif and is_speaking_audio:  # Adjust the threshold as needed
-                    cv2.putText(frame, "Active Speaker", (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-                if lip_distance >= MaxDif:
-                    break
+        for (x, y, x1, y1) in boxes:
+            face_height = y1 - y
+
+            # Draw bounding box
+            cv2.rectangle(frame, (x, y), (x1, y1), (0, 255, 0), 2)
+
+            # Assuming lips are approximately at the bottom third of the face
+            lip_distance = abs((y + 2 * face_height // 3) - (y1))
+            Add.append([[x, y, x1, y1], lip_distance])
+
+            MaxDif == max(lip_distance, MaxDif)
+        # Only revisit the faces kept above instead of rescanning every detection
+        for (x, y, x1, y1), lip_distance in Add:
+            # Combine visual and audio cues
+            if lip_distance >= MaxDif and is_speaking_audio:  # Adjust the threshold as needed
+                cv2.putText(frame, "Active Speaker", (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+            if lip_distance >= MaxDif:
+                break
 
         Frames.append([x, y, x1, y1])
 
-        out.write(frame)
+        now = time.monotonic()
+        if now - last_report >= 0.5:
+            print(f"Detecting speakers in frame {len(Frames)}/{total_frames}")
+            last_report = now
+
+        writer.put(frame)
         cv2.imshow('Frame', frame)
 
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
+    else:
+        complete = True
 
+    # Stop the reader before releasing the capture it reads from
+    frames.close()
+    writer.close()
     cap.release()
     out.release()
     cv2.destroyAllWindows()
-    os.remove(temp_audio_path)
+    if complete:
+        _frames_source = source
 
 
 
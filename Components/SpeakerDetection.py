@@ -1,9 +1,10 @@
 import cv2
 import numpy as np
+
+face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+
 #Face Detection function
 def detect_faces(video_file):
-    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-
     # Load the video
     cap = cv2.VideoCapture(video_file)
 
@@ -1,17 +1,47 @@
-from faster_whisper import WhisperModel
-import torch
+import hashlib
+from Components.Cache import load_cached, save_cached
 
-def transcribeAudio(audio_path):
-    try:
-        print("Transcribing audio...")
+MODEL_NAME = "base.en"
+
+def audio_cache_key(audio_path):
+    # Hash the audio in chunks (plus the model name) so re-runs on the same video skip Whisper
+    digest = hashlib.blake2b(MODEL_NAME.encode(), digest_size=16)
+    with open(audio_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+_model = None
+
+def get_model():
+    # Loading Whisper weights is expensive, keep one model per process
+    global _model
+    if _model is None:
+        # torch and faster_whisper are slow to import; cached transcripts never need them
+        import torch
+        from faster_whisper import WhisperModel
         Device = "cuda" if torch.cuda.is_available() else "cpu"
         print(Device)
-        model = WhisperModel("base.en", device="cuda" if torch.cuda.is_available() else "cpu")
+        _model = WhisperModel(MODEL_NAME, device=Device)
         print("Model loaded")
+    return _model
+
+def transcribeAudio(audio_path):
+    try:
+        key = audio_cache_key(audio_path)
+        cached = load_cached("transcripts", key)
+        if cached is not None:
+            print("Loaded transcription from cache")
+            return cached
+
+        print("Transcribing audio...")
+        model = get_model()
         segments, info = model.transcribe(audio=audio_path, beam_size=5, language="en", max_new_tokens=128, condition_on_previous_text=False)
         segments = list(segments)
         # print(segments)
         extracted_texts = [[segment.text, segment.start, segment.end] for segment in segments]
+
+        save_cached("transcripts", key, extracted_texts)
         return extracted_texts
     except Exception as e:
         print("Transcription Error:", e)
@@ -21,8 +51,5 @@ if __name__ == "__main__":
     audio_path = "audio.wav"
     transcriptions = transcribeAudio(audio_path)
     print("Done")
-    TransText = ""
-
-    for text, start, end in transcriptions:
-        TransText += (f"{start} - {end}: {text}")
-    print(TransText)
\ No newline at end of file
+    TransText = "".join(f"{start} - {end}: {text}" for text, start, end in transcriptions)
+    print(TransText)
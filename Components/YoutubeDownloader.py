@@ -1,6 +1,8 @@
 import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pytubefix import YouTube
-import ffmpeg
+from Components.Edit import video_encoder_args
 
 def get_video_size(stream):
 
@@ -10,8 +12,10 @@ def download_youtube_video(url):
     try:
         yt = YouTube(url)
 
-        video_streams = yt.streams.filter(type="video").order_by('resolution').desc()
-        audio_stream = yt.streams.filter(only_audio=True).first()
+        # Fetch the stream list once and filter it locally for both picks
+        streams = yt.streams
+        video_streams = streams.filter(type="video").order_by('resolution').desc()
+        audio_stream = streams.filter(only_audio=True).first()
 
         print("Available video streams:")
         for i, stream in enumerate(video_streams):
@@ -26,23 +30,45 @@ def download_youtube_video(url):
             os.makedirs('videos')
 
         print(f"Downloading video: {yt.title}")
-        video_file = selected_stream.download(output_path='videos', filename_prefix="video_")
-
-        if not selected_stream.is_progressive:
-            print("Downloading audio...")
-            audio_file = audio_stream.download(output_path='videos', filename_prefix="audio_")
+        if selected_stream.is_progressive:
+            output_file = selected_stream.download(output_path='videos', filename_prefix="video_")
+        else:
+            # Adaptive streams come as separate files, fetch both at the same time
+            print("Downloading video and audio...")
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                video_job = executor.submit(selected_stream.download, output_path='videos', filename_prefix="video_")
+                audio_job = executor.submit(audio_stream.download, output_path='videos', filename_prefix="audio_")
+                video_file = video_job.result()
+                audio_file = audio_job.result()
 
             print("Merging video and audio...")
             output_file = os.path.join('videos', f"{yt.title}.mp4")
-            stream = ffmpeg.input(video_file)
-            audio = ffmpeg.input(audio_file)
-            stream = ffmpeg.output(stream, audio, output_file, vcodec='libx264', acodec='aac', strict='experimental')
-            ffmpeg.run(stream, overwrite_output=True)
+            def merge(video_args):
+                command = [
+                    "ffmpeg", "-y", "-loglevel", "error", "-nostats",
+                    "-thread_type", "frame+slice", "-i", video_file,
+                    "-i", audio_file,
+                    "-map", "0:v", "-map", "1:a",
+                    *video_args,
+                    "-c:a", "aac", "-strict", "experimental",
+                    output_file,
+                ]
+                # -loglevel error keeps stderr quiet unless the merge actually fails
+                subprocess.run(command, check=True)
+
+            # H.264 can be remuxed as-is; VP9/AV1 are re-encoded since OpenCV's
+            # bundled FFmpeg is not guaranteed to decode them
+            if (selected_stream.video_codec or "").startswith("avc1"):
+                try:
+                    merge(["-c:v", "copy"])
+                except subprocess.CalledProcessError as e:
+                    print(f"Stream copy failed, re-encoding the video: {e}")
+                    merge(video_encoder_args())
+            else:
+                merge(video_encoder_args())
 
             os.remove(video_file)
             os.remove(audio_file)
-        else:
-            output_file = video_file
 
         
         print(f"Downloaded: {yt.title} to 'videos' folder")
@@ -51,9 +77,9 @@ def download_youtube_video(url):
 
     except Exception as e:
         print(f"An error occurred: {str(e)}")
-        print("Please make sure you have the latest version of pytube and ffmpeg-python installed.")
-        print("You can update them by running:")
-        print("pip install --upgrade pytube ffmpeg-python")
+        print("Please make sure you have the latest version of pytubefix installed.")
+        print("You can update it by running:")
+        print("pip install --upgrade pytubefix")
         print("Also, ensure that ffmpeg is installed on your system and available in your PATH.")
 
 if __name__ == "__main__":
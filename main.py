@@ -1,8 +1,13 @@
 from Components.YoutubeDownloader import download_youtube_video
-from Components.Edit import extractAudio, crop_video
+from Components.Edit import extractAudio, crop_video, snap_to_keyframe
 from Components.Transcription import transcribeAudio
-from Components.LanguageTasks import GetHighlight
-from Components.FaceCrop import crop_to_vertical, combine_videos
+from Components.LanguageTasks import GetHighlight, has_api_key, CACHE_HIGHLIGHTS
+from Components.FaceCrop import crop_to_vertical
+
+# Without highlight caching every run calls the API, so fail before the download.
+# With it a cached highlight may not need the key; GetHighlight checks again before calling
+if not has_api_key() and not CACHE_HIGHLIGHTS:
+    raise SystemExit("OPENAI_API is not set, add your OpenAI API key to the .env file")
 
 url = input("Enter YouTube video URL: ")
 Vid= download_youtube_video(url)
@@ -15,22 +20,19 @@ if Vid:
 
         transcriptions = transcribeAudio(Audio)
         if len(transcriptions) > 0:
-            TransText = ""
-
-            for text, start, end in transcriptions:
-                TransText += (f"{start} - {end}: {text}")
+            TransText = "".join(f"{start} - {end}: {text}" for text, start, end in transcriptions)
 
             start , stop = GetHighlight(TransText)
             if start != 0 and stop != 0:
+                start, on_keyframe = snap_to_keyframe(Vid, start)
                 print(f"Start: {start} , End: {stop}")
 
                 Output = "Out.mp4"
 
-                crop_video(Vid, Output, start, stop)
-                croped = "croped.mp4"
+                crop_video(Vid, Output, start, stop, keyframe=on_keyframe)
 
-                crop_to_vertical("Out.mp4", croped)
-                combine_videos("Out.mp4", croped, "Final.mp4")
+                # Crop and add the highlight's audio in one encode
+                crop_to_vertical(Output, "Final.mp4", audio_source=Output)
             else:
                 print("Error in getting highlight")
         else: